@@ -1,20 +1,100 @@
 # FC_Battery_Dashboard_REV6.py (Updated Full Version with Tank Selection, Expanders, PDF)
 import streamlit as st
 import pandas as pd
+import numpy as np
 import matplotlib.pyplot as plt
 from io import BytesIO
+import copy
 from fpdf import FPDF
 from datetime import datetime
+from typing import Optional
 import requests
-import os
 from kpi_calculator_version2 import *
 import plotly.graph_objects as go
-
-# Cache cleaning
-st.cache_data.clear()
-st.cache_resource.clear()
+from plotly.subplots import make_subplots
 
 st.set_page_config(page_title="DMFC&Battery System Dashboard", layout="wide")
+
+
+@st.cache_data(max_entries=128)
+def compute_kpis(appliances: AppState, tank_liters: float) -> tuple:
+    """KPI chain memoized on the appliance state and the tank size."""
+    return compute_all(appliances, tank_liters)
+
+
+@st.cache_data
+def _constants_df() -> pd.DataFrame:
+    """System constants table; only depends on module-level constants."""
+    return pd.DataFrame({
+        "Parameter": ["Battery Capacity", "Battery Voltage", "Battery Energy", "Fuel Cell Output", "Fuel Cell Efficiency", "Methanol Energy Density", "Methanol Consumption"],
+        "Value": [f"{BATTERY_CAPACITY_AH} Ah", f"{BATTERY_VOLTAGE} V", f"{BATTERY_CAPACITY_WH} Wh", f"{FUEL_CELL_OUTPUT_W} W", f"{FUEL_CELL_EFFICIENCY*100:.1f}%", f"{METHANOL_ENERGY_DENSITY:.2f} kWh/L", f"{METHANOL_CONSUMPTION_PER_KWH} L/kWh"]
+    })
+
+
+@st.cache_data(max_entries=128)
+def _battery_gauge(value: float) -> go.Figure:
+    """Battery autonomy gauge, rebuilt only when the value changes."""
+    return go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=value,
+        title={'text': "Battery Autonomy (h)",'font': {'size': 22,'color': "black"}},
+        gauge={
+            'axis': {'range': [0, 24]},
+            'bar': {'color': "black"},
+            'steps': [
+                {'range': [0, 2.4], 'color': "gray"},
+                {'range': [2.4, 7.2], 'color': "red"},
+                {'range': [7.2, 12], 'color': "orange"},
+                {'range': [12, 19.2], 'color': "yellow"},
+                {'range': [19.2, 24], 'color': "green"},
+            ]
+        }))
+
+
+@st.cache_data(max_entries=128)
+def _efficiency_gauge(value: float) -> go.Figure:
+    """System efficiency gauge (value in %), rebuilt only when the value changes."""
+    return go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=value,
+        title={'text': "System Efficiency (%)",'font': {'size': 22,'color': "black"}},
+        gauge={
+            'axis': {'range': [0, 100]},
+            'bar': {'color': "black"},
+            'steps': [
+                {'range': [0, 20], 'color': "red"},
+                {'range': [20, 50], 'color': "orange"},
+                {'range': [50, 80], 'color': "yellow"},
+                {'range': [80, 100], 'color': "green"},
+            ]
+        }))
+
+
+@st.cache_resource
+def _pdf_template(logo_url: Optional[str]) -> FPDF:
+    """
+    Static report header (page setup, title, logo); deep-copied for every export.
+    Download or insertion errors propagate to the caller so a failed header is never cached.
+    """
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_auto_page_break(auto=False, margin=5)
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(10, 10, "Fuel Cell & Battery System Performance Report", ln=0)
+    if logo_url:
+        pdf.image(BytesIO(_fetch_bytes(logo_url)), x=166, y=5, w=40)
+    pdf.ln(12)
+    return pdf
+
+
+@st.cache_data(ttl=86400)
+def _fetch_bytes(url: str) -> bytes:
+    """Static report assets are downloaded once per day instead of on every export."""
+    r = requests.get(url, timeout=5)
+    r.raise_for_status()
+    return r.content
+
+
 st.title("🔋 Camping Truck KPI Dashboard")
 
 col1, col2 = st.columns([4, 1])
@@ -33,55 +113,27 @@ with st.expander("ℹ️ About This App"):
 
 # Sidebar - Scenario Selection
 st.sidebar.header("Adjust Scenarios and Methanol Storage")
-scenario = st.sidebar.selectbox("Select Load Scenario", ["Base 500 W", "Moderate 750 W", "Peak 1000 W"])
+scenario = st.sidebar.selectbox("Select Load Scenario", list(SCENARIOS))
 
 # Sidebar - Methanol Tank Size Selection
 tank_option = st.sidebar.selectbox("Select Methanol Tank", ["M5 - 5 L", "M10 - 10 L", "M20 - 20 L"])
 tank_liters = int(tank_option.split('-')[1].strip().split(' ')[0])
 
-# Define appliances by scenario
-if scenario == "Base 500 W":
-    appliances = [
-        {"name": "Laptop (230 V)", "power": 95, "hours": 4},
-        {"name": "Led Lighting (12 V)", "power": 15, "hours": 6},
-        {"name": "Cool box (12 V)", "power": 60, "hours": 8},
-        {"name": "Smartphone (2 chargers)", "power": 25, "hours": 2},
-        {"name": "Electric kettle (12 V)", "power": 300, "hours": 0.5},
-        {"name": "Radio (12 V)", "power": 5, "hours": 3},
-    ]
-elif scenario == "Moderate 750 W":
-    appliances = [
-        {"name": "Laptop (230 V)", "power": 95, "hours": 4},
-        {"name": "Led Lighting (12 V)", "power": 15, "hours": 6},
-        {"name": "Cool box (12 V)", "power": 60, "hours": 8},
-        {"name": "Bed warmer (12 V)", "power": 240, "hours": 3},
-        {"name": "Smartphone (3 chargers)", "power": 35, "hours": 2},
-        {"name": "Electric kettle (12 V)", "power": 300, "hours": 0.5},
-        {"name": "Radio (12 V)", "power": 5, "hours": 3},
-    ]
-else:
-    appliances = [
-        {"name": "Laptop (230 V)", "power": 95, "hours": 4},
-        {"name": "Led Lighting (12 V)", "power": 15, "hours": 6},
-        {"name": "Cool box (12 V)", "power": 60, "hours": 8},
-        {"name": "Fan Heater (12 V)", "power": 490, "hours": 2},
-        {"name": "Smartphone (3 chargers)", "power": 35, "hours": 2},
-        {"name": "Electric kettle (12 V)", "power": 300, "hours": 0.5},
-        {"name": "Radio (12 V)", "power": 5, "hours": 3},
-    ]
-
-custom_appliances = []
+defaults = SCENARIOS[scenario]
+
+# Sliders are batched in a form so adjusting several devices triggers a single rerun
 st.sidebar.header("Adjust Operating Hours")
-for app in appliances:
-    h = st.sidebar.slider(f"{app['name']} Hours", 0.0, 24.0, float(app['hours']), 0.5)
-    custom_appliances.append({"name": app['name'], "power": app['power'], "hours": h})
+with st.sidebar.form("hours_form"):
+    custom_hours = []
+    for name, default_h in zip(defaults.names, defaults.hours):
+        h = st.slider(f"{name} Hours", 0.0, 24.0, float(default_h), 0.5)
+        custom_hours.append(h)
+    state = defaults._replace(hours=np.array(custom_hours, dtype=np.float32))
+    st.form_submit_button("Apply")
 
 # 🔹 Help Section 2: System Constants
 with st.expander("System Constants (SFC Energy AG References)"):
-    constants_df = pd.DataFrame({
-        "Parameter": ["Battery Capacity", "Battery Voltage", "Battery Energy", "Fuel Cell Output", "Fuel Cell Efficiency", "Methanol Energy Density", "Methanol Consumption"],
-        "Value": [f"{BATTERY_CAPACITY_AH} Ah", f"{BATTERY_VOLTAGE} V", f"{BATTERY_CAPACITY_WH} Wh", f"{FUEL_CELL_OUTPUT_W} W", f"{FUEL_CELL_EFFICIENCY*100:.1f}%", f"{METHANOL_ENERGY_DENSITY:.2f} kWh/L", f"{METHANOL_CONSUMPTION_PER_KWH} L/kWh"]
-    })
+    constants_df = _constants_df()
     st.table(constants_df)
 
 # 🔹 Help Section 3: KPI Formula Descriptions
@@ -96,15 +148,7 @@ with st.expander("What are the KPI Calculations about?"):
     """)
 
 # 🧾 Main Calculations
-daily_demand_wh = calculate_daily_energy_demand(custom_appliances)
-methanol_per_day = calculate_methanol_consumption(daily_demand_wh)
-autonomy_days = calculate_tank_autonomy(tank_liters, methanol_per_day)
-battery_hours = battery_discharge_time(daily_demand_wh)
-battery_energy_wh = min(BATTERY_CAPACITY_WH, daily_demand_wh)
-fuel_cell_energy_wh = max(0, daily_demand_wh - BATTERY_CAPACITY_WH)
-efficiency_pct = global_system_efficiency(battery_energy_wh, fuel_cell_energy_wh, methanol_per_day)
-battery_deficit = max(0, daily_demand_wh - BATTERY_CAPACITY_WH)
-charge_time = battery_charge_time_needed(battery_deficit)
+daily_demand_wh, methanol_per_day, autonomy_days, battery_hours, efficiency_pct, charge_time = compute_kpis(state, tank_liters)
 
 # KPIs
 k1, k2, k3 = st.columns(3)
@@ -118,20 +162,20 @@ k6.metric("⚡ Battery Charge Time", f"{charge_time:.1f} h")
 
 # Appliance Summary
 st.markdown("Equipments Energy Summary")
-df = pd.DataFrame(custom_appliances)
-df['Energy (Wh)'] = df['power'] * df['hours']
-df['Battery Capacity Used (Ah)'] = df['Energy (Wh)'] / BATTERY_VOLTAGE
-
-total_row = pd.DataFrame({
-    "name": ["**TOTAL**"],
-    "power": [df['power'].sum()],
-    "hours": ["-"],
-    "Energy (Wh)": [df['Energy (Wh)'].sum()],
-    "Battery Capacity Used (Ah)": [df['Battery Capacity Used (Ah)'].sum()]
+# Display values leave the float32 state as whole watts and float64 hours
+powers_w = state.powers.astype(int)
+hours_h = state.hours.astype(np.float64)
+energy = powers_w * hours_h
+ah = energy / BATTERY_VOLTAGE
+# TOTAL row is appended to the column arrays so the DataFrame is built in one call
+df = pd.DataFrame({
+    "Device": list(state.names) + ["**TOTAL**"],
+    "Power (W)": np.concatenate([powers_w, [powers_w.sum()]]),
+    "Hours": np.concatenate([hours_h.astype(object), ["-"]]),
+    "Energy (Wh)": np.concatenate([energy, [energy.sum()]]),
+    "Battery Capacity Used (Ah)": np.concatenate([ah, [ah.sum()]]),
 })
-
-df = pd.concat([df, total_row], ignore_index=True)
-st.dataframe(df.rename(columns={"name": "Device", "power": "Power (W)", "hours": "Hours"}))
+st.dataframe(df)
 
 # 🔹 Help Section 4: Gauges Descriptions
 with st.expander("📊 How to interpret the chart gauges"):
@@ -140,87 +184,35 @@ with st.expander("📊 How to interpret the chart gauges"):
                 The System Efficiency gauge reflects how effectively methanol fuel is converted into usable electrical energy across the system.
                 """)
 # 📊 Gauges
-fig_batt = go.Figure(go.Indicator(
-    mode="gauge+number",
-    value=battery_hours,
-    title={'text': "Battery Autonomy (h)",'font': {'size': 22,'color': "black"}},
-    gauge={
-        'axis': {'range': [0, 24]},
-        'bar': {'color': "black"},
-        'steps': [
-            {'range': [0, 2.4], 'color': "gray"},
-            {'range': [2.4, 7.2], 'color': "red"},
-            {'range': [7.2, 12], 'color': "orange"},
-            {'range': [12, 19.2], 'color': "yellow"},
-            {'range': [19.2, 24], 'color': "green"},
-        ]
-    }))
-fig_eff = go.Figure(go.Indicator(
-    mode="gauge+number",
-    value=efficiency_pct * 100,
-    title={'text': "System Efficiency (%)",'font': {'size': 22,'color': "black"}},
-    gauge={
-        'axis': {'range': [0, 100]},
-        'bar': {'color': "black"},
-        'steps': [
-            {'range': [0, 20], 'color': "red"},
-            {'range': [20, 50], 'color': "orange"},
-            {'range': [50, 80], 'color': "yellow"},
-            {'range': [80, 100], 'color': "green"},
-        ]
-    }))
+fig_batt = _battery_gauge(battery_hours)
+fig_eff = _efficiency_gauge(efficiency_pct * 100)
 
 colg1, colg2 = st.columns(2)
 colg1.plotly_chart(fig_batt, use_container_width=True)
 colg2.plotly_chart(fig_eff, use_container_width=True)
 
-fig_batt.write_image("/tmp/battery_gauge.png")
-fig_eff.write_image("/tmp/efficiency_gauge.png")
-
-
 # PDF Report
 st.markdown("### 📄 Export Report as PDF")
 if st.button("Generate PDF Performance Report"):
-    import os
     #from PIL import Image --this line is commented on 24.06.2025 due to conflicts.
-    import io
-
-    # Descargar logo del dashboard
-    logo_url = "https://raw.githubusercontent.com/Victor1492Alvarez/Fuel_Cell-Battery_kpi-dashboard/main/dashboard_logo.PNG"
-    logo_path = "/tmp/dashboard_logo.png"
-    try:
-        response = requests.get(logo_url)
-        response.raise_for_status()
-        with open(logo_path, "wb") as f:
-            f.write(response.content)
-    except Exception as e:
-        st.error(f"❌ No se pudo descargar el logo del dashboard: {e}")
-        logo_path = None
 
     # Descargar y convertir el wiring diagram a PNG válido
     diagram_url = "https://raw.githubusercontent.com/Victor1492Alvarez/Fuel_Cell-Battery_kpi-dashboard/main/wiring_diagram_1.png"
-    diagram_path = "/tmp/wiring_diagram_1_converted.png"
-    diagram_downloaded = False
+    diagram_bytes = None
     try:
-        response = requests.get(diagram_url)
-        response.raise_for_status()
-        with open(diagram_path, "wb") as f:
-            f.write(response.content)
-        diagram_downloaded = True
+        diagram_bytes = _fetch_bytes(diagram_url)
     except Exception as e:
         st.error(f"❌ Error al descargar el wiring diagram: {e}")
-    # Crear PDF
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_auto_page_break(auto=False, margin=5)
-    pdf.set_font("Arial", "B", 16)
-    pdf.cell(10, 10, "Fuel Cell & Battery System Performance Report", ln=0)
-    if logo_path and os.path.exists(logo_path):
-        try:
-            pdf.image(logo_path, x=166, y=5, w=40)
-        except Exception as e:
-            st.warning(f"⚠️ No se pudo insertar el logo: {e}")
-    pdf.ln(12)
+    # Crear PDF a partir de la cabecera estática cacheada (con el logo del dashboard)
+    logo_url = "https://raw.githubusercontent.com/Victor1492Alvarez/Fuel_Cell-Battery_kpi-dashboard/main/dashboard_logo.PNG"
+    try:
+        pdf = copy.deepcopy(_pdf_template(logo_url))
+    except requests.RequestException as e:
+        st.error(f"❌ No se pudo descargar el logo del dashboard: {e}")
+        pdf = copy.deepcopy(_pdf_template(None))
+    except Exception as e:
+        st.warning(f"⚠️ No se pudo insertar el logo: {e}")
+        pdf = copy.deepcopy(_pdf_template(None))
 
     pdf.set_font("Arial", "B", 11)
     pdf.cell(200, 6, "System KPIs", ln=True)
@@ -236,19 +228,26 @@ if st.button("Generate PDF Performance Report"):
     pdf.set_font("Arial", "B", 11)
     pdf.cell(200, 6, "Equipments Energy Summary", ln=True)
     pdf.set_font("Arial", size=10)
-    for _, row in df[:-1].iterrows():
-        pdf.cell(200, 6, f"{row['name']}: {row['power']}W x {row['hours']}h = {row['Energy (Wh)']:.0f}Wh | {row['Battery Capacity Used (Ah)']:.1f}Ah", ln=True)
+    for n, p, h, e, a in zip(state.names, powers_w.tolist(), hours_h.tolist(), energy, ah):
+        pdf.cell(200, 6, f"{n}: {p:.0f}W x {h}h = {e:.0f}Wh | {a:.1f}Ah", ln=True)
 
     pdf.ln(4)
     pdf.set_font("Arial", "B", 11)
     pdf.cell(200, 6, "System Constants", ln=True)
     pdf.set_font("Arial", size=10)
-    for i, row in constants_df.iterrows():
-        pdf.cell(200, 6, f"{row['Parameter']}: {row['Value']}", ln=True)
+    for param, value in zip(constants_df['Parameter'], constants_df['Value']):
+        pdf.cell(200, 6, f"{param}: {value}", ln=True)
 
     pdf.ln(4)
-    pdf.image("/tmp/battery_gauge.png", x=0, y=pdf.get_y(), w=110)
-    pdf.image("/tmp/efficiency_gauge.png", x=103, y=pdf.get_y(), w=110)
+    # Gauges are only rendered to PNG (Kaleido) when a report is actually requested
+    # Both gauges side by side in one figure: a single Kaleido export per report
+    fig_gauges = make_subplots(rows=1, cols=2, specs=[[{"type": "indicator"}, {"type": "indicator"}]])
+    fig_gauges.add_trace(fig_batt.data[0], 1, 1)
+    fig_gauges.add_trace(fig_eff.data[0], 1, 2)
+    buf_gauges = BytesIO()
+    fig_gauges.write_image(buf_gauges, format="png", width=1600, height=600, engine="kaleido")
+    buf_gauges.seek(0)
+    pdf.image(buf_gauges, x=0, y=pdf.get_y(), w=210)
 
 
 
@@ -257,10 +256,10 @@ if st.button("Generate PDF Performance Report"):
     pdf.cell(200, 6, "The gauges show key metrics for system autonomy and energy conversion efficiency.", ln=True)
 
     # Insertar wiring diagram convertido
-    if diagram_downloaded and os.path.exists(diagram_path):
+    if diagram_bytes:
         try:
             pdf.ln(10)
-            pdf.image(diagram_path, x=110, y=110, w=90)
+            pdf.image(BytesIO(diagram_bytes), x=110, y=110, w=90)
         except Exception as e:
             st.warning(f"⚠️ No se pudo insertar el wiring diagram en el PDF: {e}")
 
@@ -273,5 +272,5 @@ if st.button("Generate PDF Performance Report"):
     pdf.cell(200, 35, "Thanks for using our App. Servus and enjoy your camping days in the Alps!.", ln=True)
 
     # Descargar PDF final
-    pdf_bytes = pdf.output(dest='S').encode('latin1')
+    pdf_bytes = bytes(pdf.output())
     st.download_button("📥 Download PDF Report", data=pdf_bytes, file_name="kpi_report.pdf", mime="application/pdf")
@@ -1,5 +1,6 @@
 # kpi_calculator.py
-from typing import List, Dict
+from typing import NamedTuple, Tuple
+import numpy as np
 
 # Constants
 METHANOL_CONSUMPTION_PER_KWH = 0.9  # liters per kWh for EFOY Pro 2800
@@ -11,8 +12,33 @@ FUEL_CELL_EFFICIENCY = 0.35  # typical value
 METHANOL_ENERGY_DENSITY = 5.5 / 5  # approx. 1.1 kWh/l
 BATTERY_EFFICIENCY = 0.90  # lithium battery round-trip efficiency (90%)
 
-def calculate_daily_energy_demand(appliances: List[Dict]) -> float:
-    return sum(app['power'] * app['hours'] for app in appliances)  # Wh
+class AppState(NamedTuple):
+    """Appliances as parallel arrays: device names, power [W] and operating hours [h]."""
+    names: Tuple[str, ...]
+    powers: np.ndarray
+    hours: np.ndarray
+
+# Appliances by scenario with their default operating hours, built once at import
+SCENARIOS = {
+    "Base 500 W": AppState(
+        ("Laptop (230 V)", "Led Lighting (12 V)", "Cool box (12 V)", "Smartphone (2 chargers)", "Electric kettle (12 V)", "Radio (12 V)"),
+        np.array([95, 15, 60, 25, 300, 5], dtype=np.float32),
+        np.array([4, 6, 8, 2, 0.5, 3], dtype=np.float32),
+    ),
+    "Moderate 750 W": AppState(
+        ("Laptop (230 V)", "Led Lighting (12 V)", "Cool box (12 V)", "Bed warmer (12 V)", "Smartphone (3 chargers)", "Electric kettle (12 V)", "Radio (12 V)"),
+        np.array([95, 15, 60, 240, 35, 300, 5], dtype=np.float32),
+        np.array([4, 6, 8, 3, 2, 0.5, 3], dtype=np.float32),
+    ),
+    "Peak 1000 W": AppState(
+        ("Laptop (230 V)", "Led Lighting (12 V)", "Cool box (12 V)", "Fan Heater (12 V)", "Smartphone (3 chargers)", "Electric kettle (12 V)", "Radio (12 V)"),
+        np.array([95, 15, 60, 490, 35, 300, 5], dtype=np.float32),
+        np.array([4, 6, 8, 2, 2, 0.5, 3], dtype=np.float32),
+    ),
+}
+
+def calculate_daily_energy_demand(appliances: AppState) -> float:
+    return float(np.dot(appliances.powers, appliances.hours))  # Wh
 
 def calculate_methanol_consumption(energy_wh: float) -> float:
     return (energy_wh / 1000) * METHANOL_CONSUMPTION_PER_KWH
@@ -58,6 +84,21 @@ def global_system_efficiency(battery_energy_wh: float, fuel_cell_energy_wh: floa
 def battery_charge_time_needed(energy_to_charge_wh: float, fuel_cell_output_w: float = FUEL_CELL_OUTPUT_W) -> float:
     return energy_to_charge_wh / fuel_cell_output_w
 
+def compute_all(appliances: AppState, tank_liters: float) -> Tuple[float, float, float, float, float, float]:
+    """
+    Full KPI chain in one pass: daily demand (Wh), methanol per day (L), tank autonomy (days),
+    battery autonomy (h), global system efficiency (fraction) and battery charge time (h).
+    """
+    daily_wh = calculate_daily_energy_demand(appliances)
+    methanol_l = calculate_methanol_consumption(daily_wh)
+    autonomy_days = calculate_tank_autonomy(tank_liters, methanol_l)
+    battery_h = battery_discharge_time(daily_wh)
+    fuel_cell_wh = daily_wh - BATTERY_CAPACITY_WH
+    fuel_cell_wh = fuel_cell_wh if fuel_cell_wh > 0 else 0.0
+    efficiency = global_system_efficiency(daily_wh - fuel_cell_wh, fuel_cell_wh, methanol_l)
+    charge_h = battery_charge_time_needed(fuel_cell_wh)
+    return daily_wh, methanol_l, autonomy_days, battery_h, efficiency, charge_h
+
 def system_efficiency(energy_delivered_kwh: float, methanol_liters: float) -> float:
     if methanol_liters == 0:
         return 0.0
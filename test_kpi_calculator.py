@@ -0,0 +1,37 @@
+# test_kpi_calculator.py
+import numpy as np
+import pytest
+
+from kpi_calculator_version2 import *
+
+
+def baseline_chain(appliances, tank_liters):
+    """KPI chain exactly as the dashboard computed it before compute_all existed."""
+    daily_demand_wh = sum(app['power'] * app['hours'] for app in appliances)
+    methanol_per_day = calculate_methanol_consumption(daily_demand_wh)
+    autonomy_days = calculate_tank_autonomy(tank_liters, methanol_per_day)
+    battery_hours = battery_discharge_time(daily_demand_wh)
+    battery_energy_wh = min(BATTERY_CAPACITY_WH, daily_demand_wh)
+    fuel_cell_energy_wh = max(0, daily_demand_wh - BATTERY_CAPACITY_WH)
+    efficiency_pct = global_system_efficiency(battery_energy_wh, fuel_cell_energy_wh, methanol_per_day)
+    battery_deficit = max(0, daily_demand_wh - BATTERY_CAPACITY_WH)
+    charge_time = battery_charge_time_needed(battery_deficit)
+    return daily_demand_wh, methanol_per_day, autonomy_days, battery_hours, efficiency_pct, charge_time
+
+
+@pytest.mark.parametrize("scenario", list(SCENARIOS))
+@pytest.mark.parametrize("tank_liters", [5, 10, 20])
+def test_compute_all_matches_baseline_chain(scenario, tank_liters):
+    state = SCENARIOS[scenario]
+    appliances = [{"name": n, "power": float(p), "hours": float(h)} for n, p, h in zip(*state)]
+    assert compute_all(state, tank_liters) == pytest.approx(baseline_chain(appliances, tank_liters))
+
+
+@pytest.mark.parametrize("scenario", list(SCENARIOS))
+def test_compute_all_zero_hours(scenario):
+    state = SCENARIOS[scenario]
+    appliances = [{"name": n, "power": float(p), "hours": 0.0} for n, p in zip(state.names, state.powers)]
+    result = compute_all(state._replace(hours=np.zeros_like(state.hours)), 10)
+    assert result == baseline_chain(appliances, 10)
+    assert result[2] == float('inf')
+    assert result[3] == float('inf')